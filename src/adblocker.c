@@ -3,6 +3,9 @@
 #include <string.h>
 #include <unistd.h>
 #include <signal.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include <net/if.h>
 #include <linux/if_link.h>
 #include <bpf/bpf.h>
@@ -16,6 +19,7 @@ static int ifindex = 0;
 static __u32 xdp_flags = XDP_FLAGS_UPDATE_IF_NOEXIST | XDP_FLAGS_SKB_MODE;
 static struct bpf_object *obj = NULL;
 static int prog_fd = -1;
+static int stats_file_fd = -1;
 
 // Graceful exit handler
 static void cleanup(int sig) {
@@ -26,6 +30,9 @@ static void cleanup(int sig) {
         bpf_object__close(obj);
     }
     domain_store_cleanup();
+    if (stats_file_fd >= 0) {
+        close(stats_file_fd);
+    }
     exit(0);
 }
 
@@ -37,31 +44,59 @@ static int load_blacklist_domains(void) {
         NULL
     };
     
-    FILE *fp = NULL;
+    int fd = -1;
     int i = 0;
     while (blacklist_paths[i] != NULL) {
-        fp = fopen(blacklist_paths[i], "r");
-        if (fp != NULL) break;
+        fd = open(blacklist_paths[i], O_RDONLY | O_CLOEXEC);
+        if (fd >= 0) break;
         i++;
     }
     
-    if (!fp) {
+    if (fd < 0) {
         fprintf(stderr, "[eBAF] Error: Could not find spotify-blacklist.txt\n");
         return -1;
     }
+
+    // Map the list and scan it in place rather than copying it line by line through stdio.
+    struct stat st;
+    if (fstat(fd, &st) != 0) {
+        close(fd);
+        return -1;
+    }
+    const char *data = NULL;
+    if (st.st_size > 0) {
+        data = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+        if (data == MAP_FAILED) {
+            close(fd);
+            return -1;
+        }
+    }
+    close(fd);
     
-    char line[512];
+    const char *pos = data;
+    const char *end = data + st.st_size;
     int count = 0;
-    while (fgets(line, sizeof(line), fp)) {
-        // Strip whitespace, newlines, and ignore comments
-        char *domain = strtok(line, " \t\n\r#");
-        if (!domain || domain[0] == '#') continue;
-        
+    while (pos < end) {
+        const char *eol = memchr(pos, '\n', end - pos);
+        if (!eol) eol = end;
+
+        // Strip leading whitespace, skip blank and comment lines, and take the first word.
+        while (pos < eol && (*pos == ' ' || *pos == '\t' || *pos == '\r')) pos++;
+        const char *word = pos;
+        while (pos < eol && *pos != ' ' && *pos != '\t' && *pos != '\r' && *pos != '#') pos++;
+        size_t len = pos - word;
+        pos = eol + 1;
+        if (len == 0) continue;
+
+        char domain[DOMAIN_MAX_SIZE];
+        if (len >= sizeof(domain)) len = sizeof(domain) - 1;
+        memcpy(domain, word, len);
+        domain[len] = '\0';
         if (domain_store_add(domain) == 0) {
             count++;
         }
     }
-    fclose(fp);
+    if (data) munmap((void *)data, st.st_size);
     printf("[eBAF] Loaded %d domains from blacklist.\n", count);
     return 0;
 }
@@ -144,11 +179,24 @@ if (bpf_xdp_attach(ifindex, prog_fd, xdp_flags, NULL) < 0) {        fprintf(stde
         bpf_map_lookup_elem(stats_fd, &total_key, &total_pkts);
         bpf_map_lookup_elem(stats_fd, &blocked_key, &blocked_pkts);
 
-        // Write to /tmp for Python dashboard
-        FILE *f = fopen("/tmp/ebaf-stats.dat", "w");
-        if (f) {
-            fprintf(f, "Total:%llu\nBlocked:%llu\n", total_pkts, blocked_pkts);
-            fclose(f);
+        // Write to /tmp for Python dashboard. The file is opened once and overwritten in place
+        // with a single write, instead of being reopened and truncated on every tick.
+        // Writes to a deleted file still succeed, so reopen if it was unlinked (e.g. by make clean).
+        struct stat st;
+        if (stats_file_fd >= 0 && fstat(stats_file_fd, &st) == 0 && st.st_nlink == 0) {
+            close(stats_file_fd);
+            stats_file_fd = -1;
+        }
+        if (stats_file_fd < 0) {
+            stats_file_fd = open("/tmp/ebaf-stats.dat", O_WRONLY | O_CREAT | O_CLOEXEC, 0644);
+        }
+        if (stats_file_fd >= 0) {
+            char buf[64];
+            int len = snprintf(buf, sizeof(buf), "Total:%llu\nBlocked:%llu\n", total_pkts, blocked_pkts);
+            if (pwrite(stats_file_fd, buf, len, 0) != len || ftruncate(stats_file_fd, len) != 0) {
+                close(stats_file_fd);  // Reopen on the next tick.
+                stats_file_fd = -1;
+            }
         }
 
         // Update specific domain drop counts
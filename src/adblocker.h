@@ -15,6 +15,13 @@
 #define DOMAIN_MAX_SIZE 256  // Maximum length for a domain name string.
 #define MAX_DOMAINS 10000    // Maximum number of domains stored in the domain_store.
 #define RESOLUTION_INTERVAL_SEC 10 * 60  // Interval (in seconds) for re-resolving domains (i.e. every 10 minutes).
+#define RESOLVER_THREADS 32  // Number of threads resolving blacklist domains concurrently.
+#define LIST_IO_BUFFER_SIZE (1 << 16)  // stdio buffer for the whitelist and DNS cache files, so each is read or written in a few syscalls.
+#define DNS_CACHE_DIR "/var/cache/ebaf"                 // Survives restarts, unlike /tmp/ebaf*.
+#define DNS_CACHE_FILE DNS_CACHE_DIR "/dns-cache.dat"  // Resolved addresses kept across runs.
+#define DNS_CACHE_LOCK_FILE DNS_CACHE_DIR "/dns-cache.lock"  // flock()ed while the cache is rewritten.
+#define DNS_CACHE_TTL_SEC 24 * 60 * 60                 // How long cached addresses are reused (1 day).
+#define DNS_NEGATIVE_TTL_SEC 60 * 60                   // How long a nonexistent domain is not retried (1 hour).
 
 // Domain resolution status constants.
 // Used to represent whether a domain resolution was successful or not.
@@ -1,52 +1,425 @@
 #!/usr/bin/env python3
 import http.server            # For serving HTTP requests.
-import socketserver         # To create a simple HTTP server.
-import subprocess           # To run external commands (e.g., pgrep, ip link).
+import subprocess           # To run external commands (e.g., ip link).
 import json                 # For encoding/decoding JSON data.
 import time                 # To handle time-related functionality.
-import os                   # For OS-related functions (e.g., checking file existence).
+import os                   # For OS-related functions (e.g., stat, pread).
 import re                   # For regex operations.
-from datetime import datetime  # To generate formatted timestamps.
+import threading            # To guard the shared stats cache.
+import gzip                 # To compress the dashboard page for clients that accept it.
+import zlib                 # To continue a precompressed gzip stream per page.
+import hashlib              # To derive ETags from stats snapshots.
+import socket               # For rtnetlink queries.
+import struct               # To pack and parse netlink messages.
+import atexit               # To save the rate history on shutdown.
+import collections          # For the bounded in-memory rate history.
+import functools            # To memoize rendered page fragments.
+import sys                  # For writing batched access-log lines to stderr.
+
+# orjson is optional: it serializes straight to bytes and is much faster than json.
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+    _json_loads = json.loads
+
+# NumPy is optional: when present, the rate graph is plotted with vectorized array operations.
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Global variable to track dashboard start time
 DASHBOARD_START_TIME = time.time()
 
-# DashboardHandler extends SimpleHTTPRequestHandler to serve both HTML and API endpoints.
-class DashboardHandler(http.server.SimpleHTTPRequestHandler):
+# Seconds between background refreshes of process and interface discovery.
+REFRESH_INTERVAL = 1.0
+
+# Rate history for the graph: kept in memory, saved to disk at most every HISTORY_PERSIST_INTERVAL
+# seconds and on exit. Only the last 100 data points are kept, for full graph width utilization.
+RATE_HISTORY_FILE = '/tmp/ebaf-rate-history.json'
+HISTORY_PERSIST_INTERVAL = 30.0
+_rate_history = collections.deque(maxlen=100)
+_last_history_persist = 0.0
+
+# Access-log lines waiting to be written; flushed to stderr in one write every LOG_FLUSH_INTERVAL seconds.
+LOG_FLUSH_INTERVAL = 1.0
+_access_log = collections.deque(maxlen=1000)
+
+# Seconds to reuse the detected XDP interface; attachments rarely change while running.
+INTERFACE_TTL = 5.0
+
+# Formatted wall-clock time, cached per second as (epoch_second, text).
+_ts_cache = (0, '')
+
+# Return the current time as "YYYY-mm-dd HH:MM:SS", formatting each second only once.
+def _now_string():
+    global _ts_cache
+    now = int(time.time())
+    cached = _ts_cache
+    if cached[0] != now:
+        cached = (now, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)))
+        _ts_cache = cached  # Single rebinding keeps the pair consistent across threads.
+    return cached[1]
+
+# Weak ETag for a stats snapshot. Both the page and the JSON are rendered purely from the
+# snapshot, so the tag is mainly the key for the rendered page and API body caches. The snapshot
+# includes the timestamp, runtime and rate history, so it changes every stats window and a 304
+# only answers repeat requests within one window, never the 3 s poller.
+def _stats_etag(stats):
+    digest = hashlib.blake2b(repr(stats).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+# Matches the "Total:<n>" / "Blocked:<n>" lines written by the adblocker to /tmp/ebaf-stats.dat.
+_STATS_RE = re.compile(rb'^(total|blocked):[ \t]*(\d+)', re.M | re.I)
+_STATS_KEYS = {b'total': 'total_packets', b'blocked': 'blocked_packets'}
+
+# Matches the "<index>: <ifname>:" header line of `ip link show` output.
+_IFACE_RE = re.compile(rb'\d+:\s+(\w+):')
+
+# Check whether eBAF (the userspace program loading the eBPF XDP program) is running.
+# Scans /proc/<pid>/cmdline in-process, matching what `pgrep -f adblocker` did without a fork.
+def _adblocker_running():
+    own_pid = str(os.getpid())
+    try:
+        entries = os.scandir('/proc')
+    except OSError:
+        return False
+    with entries:
+        for entry in entries:
+            if not entry.name.isdigit() or entry.name == own_pid:
+                continue
+            try:
+                with open(f'/proc/{entry.name}/cmdline', 'rb') as f:
+                    if b'adblocker' in f.read():
+                        return True
+            except OSError:
+                continue  # Process exited or is not readable.
+    return False
+
+# rtnetlink constants from <linux/netlink.h> and <linux/rtnetlink.h>.
+_NLMSG_ERROR = 2
+_NLMSG_DONE = 3
+_RTM_NEWLINK = 16
+_RTM_GETLINK = 18
+_NLM_F_REQUEST_DUMP = 0x301  # NLM_F_REQUEST | NLM_F_DUMP
+_IFLA_IFNAME = 3
+_IFLA_XDP = 43
+_IFLA_XDP_ATTACHED = 2
+_IFLA_XDP_PROG_ID = 4
+_NLA_TYPE_MASK = 0x3fff
+
+# Iterate (type, payload) over the netlink attributes packed in `data`.
+def _iter_rtattrs(data):
+    offset = 0
+    while offset + 4 <= len(data):
+        length, attr_type = struct.unpack_from('HH', data, offset)
+        if length < 4:
+            break
+        yield attr_type & _NLA_TYPE_MASK, data[offset + 4:offset + length]
+        offset += (length + 3) & ~3
+
+# Find the interface with an XDP program attached by dumping links over rtnetlink (RTM_GETLINK)
+# and checking each link's IFLA_XDP attributes. Returns the name, '' if none is attached, or
+# None if the netlink query fails.
+def _netlink_xdp_interface():
+    try:
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE) as sock:
+            sock.bind((0, 0))
+            # nlmsghdr followed by an empty ifinfomsg: dump every link.
+            sock.send(struct.pack('=IHHII16x', 32, _RTM_GETLINK, _NLM_F_REQUEST_DUMP, 1, 0))
+            while True:
+                data = sock.recv(65536)
+                offset = 0
+                while offset + 16 <= len(data):
+                    msg_len, msg_type = struct.unpack_from('=IH', data, offset)
+                    if msg_len < 16 or msg_type == _NLMSG_DONE:
+                        return ''
+                    if msg_type == _NLMSG_ERROR:
+                        return None
+                    if msg_type == _RTM_NEWLINK:
+                        name, attached = None, False
+                        # Attributes follow the 16-byte nlmsghdr and 16-byte ifinfomsg.
+                        for attr_type, payload in _iter_rtattrs(data[offset + 32:offset + msg_len]):
+                            if attr_type == _IFLA_IFNAME:
+                                name = payload.rstrip(b'\0').decode()
+                            elif attr_type == _IFLA_XDP:
+                                for xdp_type, xdp_payload in _iter_rtattrs(payload):
+                                    if xdp_type == _IFLA_XDP_ATTACHED and xdp_payload[:1] != b'\0':
+                                        attached = True
+                                    elif xdp_type == _IFLA_XDP_PROG_ID and struct.unpack_from('=I', xdp_payload)[0]:
+                                        attached = True
+                        if attached and name:
+                            return name
+                    offset += (msg_len + 3) & ~3
+    except (OSError, AttributeError, struct.error, UnicodeDecodeError):
+        return None
+
+# Format an elapsed number of seconds as e.g. "1h 2m 3s", dropping leading zero units.
+def _format_uptime(elapsed):
+    minutes, seconds = divmod(int(elapsed), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours > 0:
+        return f"{hours}h {minutes}m {seconds}s"
+    if minutes > 0:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+# Helper function to get the interface with XDP program attached
+def get_xdp_interface():
+    iface = _netlink_xdp_interface()
+    if iface is not None:
+        return iface or 'Unknown'
+
+    # Netlink is not usable: parse `ip link show` instead.
+    try:
+        result = subprocess.run(['ip', 'link', 'show'], capture_output=True)
+        lines = result.stdout.split(b'\n')
+        for i, line in enumerate(lines):
+            line = line.lower()
+            if b'xdp' in line and b'prog' in line:
+                # Get the interface name from the current or previous line
+                for j in range(max(0, i-2), min(len(lines), i+2)):
+                    match = _IFACE_RE.search(lines[j])
+                    if match:
+                        return match.group(1).decode()
+    except:
+        pass
+    return 'Unknown'
+
+# Last detected XDP interface as (expires_at, name).
+_iface_cache = (0.0, 'Unknown')
+
+# Load the rate history saved by a previous dashboard run.
+def _load_rate_history():
+    try:
+        with open(RATE_HISTORY_FILE, 'rb') as f:
+            _rate_history.extend(_json_loads(f.read()))
+    except:
+        pass
+
+# Save the rate history atomically so a crash mid-write never leaves a truncated file
+# for the next start to load.
+def _persist_rate_history():
+    global _last_history_persist
+    _last_history_persist = time.monotonic()
+    tmp_file = f'{RATE_HISTORY_FILE}.{os.getpid()}'
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(_json_dumps(list(_rate_history)))
+        os.replace(tmp_file, RATE_HISTORY_FILE)
+    except:
+        pass
+
+# Discovery results that need syscalls or subprocesses: whether eBAF is running and its interface.
+def _discover():
+    global _iface_cache
+    now = time.monotonic()
+    if now >= _iface_cache[0]:
+        # eBPF XDP programs are attached at the network driver level.
+        _iface_cache = (now + INTERFACE_TTL, get_xdp_interface())
+    return {
+        'running': _adblocker_running(),
+        'interface': _iface_cache[1],
+    }
+
+# Background loop keeping DashboardHandler._discovery fresh, off the request path.
+# A failed probe keeps the previous result; the thread must not die on one bad pass.
+def _refresh_loop():
+    while True:
+        try:
+            DashboardHandler._discovery = _discover()
+        except Exception:
+            pass
+        time.sleep(REFRESH_INTERVAL)
+
+# Write out the pending access-log lines with a single stderr write.
+def _flush_access_log():
+    lines = []
+    while _access_log:
+        try:
+            lines.append(_access_log.popleft())
+        except IndexError:
+            break
+    if lines:
+        sys.stderr.write(''.join(lines))
+        sys.stderr.flush()
+
+# Background loop draining the access log, so requests never block on stderr.
+def _log_flush_loop():
+    while True:
+        time.sleep(LOG_FLUSH_INTERVAL)
+        _flush_access_log()
+
+# DashboardHandler extends BaseHTTPRequestHandler to serve both HTML and API endpoints;
+# nothing is served from disk, so SimpleHTTPRequestHandler's file-serving setup is skipped.
+class DashboardHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between the page's periodic API polls.
+    protocol_version = 'HTTP/1.1'
+    # Set TCP_NODELAY on accepted sockets so small responses aren't held back by Nagle.
+    disable_nagle_algorithm = True
+    # Buffer the response so status line, headers and body go out in one send(); BaseHTTPRequestHandler
+    # flushes wfile after each request. The buffer must hold a whole response: -1 would give the
+    # 8 KiB io default, and the ~9 KB uncompressed page would then be split into two writes.
+    wbufsize = 64 * 1024
+
+    # Short-lived stats snapshot shared by all requests: (expires_at, stats, etag).
+    # The page polls every 3 seconds, so most requests can reuse it.
+    _stats_cache = None
+    _stats_lock = threading.Lock()
+    _stats_ttl = 1.0
+
+    # Counters parsed from /tmp/ebaf-stats.dat, keyed by its (inode, mtime_ns, size),
+    # and the descriptor it is read through.
+    _stats_file_cache = None
+    _stats_fd = None
+    _stats_fd_ino = None
+
+    # Latest result of _discover(), replaced wholesale by the refresher thread.
+    _discovery = None
+
+    # (time, total_packets, blocked_packets) from the previous collection, used to compute live rates.
+    _prev_snapshot = None
+
+    # Last rendered page with its encoded and gzipped bodies: (etag, body, gzip_body).
+    # Requests within the same stats window share one render.
+    _page_cache = None
+    _page_lock = threading.Lock()
+
+    # Last JSON API body: (etag, body).
+    _api_cache = None
+    _api_lock = threading.Lock()
+
     # Overrides the GET HTTP method.
     def do_GET(self):
         if self.path == '/':
             self.serve_dashboard()  # Serve the main dashboard page.
         elif self.path == '/api/stats':
             self.serve_api()        # Serve JSON API with statistics.
+        elif self.path == '/static/dashboard.css':
+            self.serve_css()        # Serve the dashboard stylesheet.
         else:
             self.send_error(404)    # Return 404 for unknown paths.
 
     # Serve an HTML dashboard page.
     def serve_dashboard(self):
+        stats, etag = self._cached_stats()  # Gather current statistics.
+        if self.not_modified(etag):
+            return
+        body, gzip_body = self.render_page(stats, etag)
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if use_gzip:
+            body = gzip_body
+
         self.send_response(200)
         self.send_header('Content-type', 'text/html')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
-        stats = self.get_stats()       # Gather current statistics.
-        html = self.generate_html(stats)  # Generate dashboard HTML using stats.
-        self.wfile.write(html.encode())
+        self.wfile.write(body)
+
+    # HTTP/1.0 clients only reuse the connection if the response confirms keep-alive.
+    def end_headers(self):
+        if not self.close_connection and self.request_version == 'HTTP/1.0':
+            self.send_header('Connection', 'keep-alive')
+        super().end_headers()
+
+    # Queue access-log lines instead of writing each one to stderr as it happens.
+    def log_message(self, format, *args):
+        _access_log.append("%s - - [%s] %s\n" % (self.address_string(),
+                                                 self.log_date_time_string(), format % args))
+
+    # Answer 304 Not Modified when the client already holds the representation tagged `etag`.
+    def not_modified(self, etag):
+        if_none_match = self.headers.get('If-None-Match')
+        if not if_none_match or etag not in [tag.strip() for tag in if_none_match.split(',')]:
+            return False
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.end_headers()
+        return True
+
+    # Serve the static stylesheet with long-lived caching.
+    def serve_css(self):
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if use_gzip:
+            body, etag = _CSS_GZIP, _CSS_GZIP_ETAG
+        else:
+            body, etag = _CSS_BYTES, _CSS_ETAG
+        if self.not_modified(etag):
+            return
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/css; charset=utf-8')
+        self.send_header('Cache-Control', 'public, max-age=86400')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Return the UTF-8 and gzip encodings of the page for a stats snapshot,
+    # rendering and compressing it only once per snapshot.
+    def render_page(self, stats, etag):
+        cls = DashboardHandler
+        with cls._page_lock:
+            if cls._page_cache is None or cls._page_cache[0] != etag:
+                middle = self.generate_html(stats).encode()  # Generate dashboard HTML using stats.
+                body = b''.join((_HTML_HEAD_BYTES, middle, _HTML_TAIL_BYTES))
+                # Resume from the compressor that already consumed the static head.
+                compressor = _HTML_HEAD_COMPRESSOR.copy()
+                gzip_body = b''.join((_HTML_HEAD_GZIP, compressor.compress(middle),
+                                      compressor.compress(_HTML_TAIL_BYTES), compressor.flush()))
+                cls._page_cache = (etag, body, gzip_body)
+            return cls._page_cache[1], cls._page_cache[2]
 
     # Serve statistics as JSON format for API consumers.
     def serve_api(self):
+        stats, etag = self._cached_stats()  # Collect statistics.
+        if self.not_modified(etag):
+            return
+        body = self.encode_api(stats, etag)
+
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')  # Allow CORS.
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
-        stats = self.get_stats()       # Collect statistics.
-        self.wfile.write(json.dumps(stats).encode())
+        self.wfile.write(body)
+
+    # Return the JSON encoding of a stats snapshot, serializing it only once per snapshot.
+    def encode_api(self, stats, etag):
+        cls = DashboardHandler
+        with cls._api_lock:
+            if cls._api_cache is None or cls._api_cache[0] != etag:
+                cls._api_cache = (etag, _json_dumps(stats))
+            return cls._api_cache[1]
+
+    # Return the cached stats snapshot and its ETag, recollecting them once the TTL expires.
+    # Both the page and the API go through here, so they share one collection per window.
+    def _cached_stats(self):
+        cls = DashboardHandler
+        with cls._stats_lock:
+            now = time.monotonic()
+            if cls._stats_cache is None or now >= cls._stats_cache[0]:
+                stats = self.collect_stats()
+                cls._stats_cache = (now + cls._stats_ttl, stats, _stats_etag(stats))
+            return dict(cls._stats_cache[1]), cls._stats_cache[2]
 
     # Helper function to gather live statistics and system status.
-    def get_stats(self):
+    def collect_stats(self):
         # Initialize default stats.
         stats = {
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'timestamp': _now_string(),
             'running': False,
             'interface': 'Unknown',
             'runtime': 'Unknown',
@@ -59,74 +432,62 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             'rate_history': []
         }
 
-        # Check if eBAF (the userspace program loading the eBPF XDP program) is running.
-        # pgrep is used to search for a process with 'adblocker' in its command-line.
-        try:
-            result = subprocess.run(['pgrep', '-f', 'adblocker'], capture_output=True, text=True)
-            stats['running'] = result.returncode == 0
-        except:
-            pass
-
-        # Find the network interface with an attached XDP program.
-        # eBPF XDP programs are attached at the network driver level.
-        stats['interface'] = self.get_xdp_interface()
+        # Check if eBAF (the userspace program loading the eBPF XDP program) is running,
+        # and find the network interface with an attached XDP program. The refresher thread
+        # keeps this current; discover inline only if it has not produced a result yet.
+        discovery = DashboardHandler._discovery or _discover()
+        stats['running'] = discovery['running']
+        stats['interface'] = discovery['interface']
 
         # Calculate dashboard runtime
-        runtime_seconds = int(time.time() - DASHBOARD_START_TIME)
-        hours = runtime_seconds // 3600
-        minutes = (runtime_seconds % 3600) // 60
-        seconds = runtime_seconds % 60
-        
-        if hours > 0:
-            stats['runtime'] = f"{hours}h {minutes}m {seconds}s"
-        elif minutes > 0:
-            stats['runtime'] = f"{minutes}m {seconds}s"
-        else:
-            stats['runtime'] = f"{seconds}s"
+        stats['runtime'] = _format_uptime(time.time() - DASHBOARD_START_TIME)
 
         # Read statistics from a temporary file created by the userspace program.
         # This file is populated by the eBPF program via updating maps and is read periodically.
+        # The adblocker rewrites it in place every 2 seconds, so skip re-parsing while its mtime is
+        # unchanged, and read it with pread() on a descriptor kept open across requests.
         stats_file = '/tmp/ebaf-stats.dat'
-        if os.path.exists(stats_file):
-            try:
-                with open(stats_file, 'r') as f:
-                    for line in f:
-                        if line.lower().startswith('total:'):
-                            stats['total_packets'] = int(line.split(':')[1].strip())
-                        elif line.lower().startswith('blocked:'):
-                            stats['blocked_packets'] = int(line.split(':')[1].strip())
-            except:
-                pass
+        try:
+            cls = DashboardHandler
+            st = os.stat(stats_file)
+            key = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if cls._stats_file_cache is not None and cls._stats_file_cache[0] == key:
+                counters = cls._stats_file_cache[1]
+            else:
+                # Reopen if the file was deleted and recreated (e.g. eBAF restarted).
+                if cls._stats_fd is None or cls._stats_fd_ino != st.st_ino:
+                    if cls._stats_fd is not None:
+                        os.close(cls._stats_fd)
+                        cls._stats_fd = None
+                    cls._stats_fd = os.open(stats_file, os.O_RDONLY)
+                    cls._stats_fd_ino = os.fstat(cls._stats_fd).st_ino
+                data = os.pread(cls._stats_fd, 4096, 0)
+                counters = {}
+                for match in _STATS_RE.finditer(data):
+                    counters[_STATS_KEYS[match.group(1).lower()]] = int(match.group(2))
+                cls._stats_file_cache = (key, counters)
+            stats.update(counters)
+        except:
+            pass
 
         # Calculate the percentage of blocked packets.
         if stats['total_packets'] > 0:
             stats['blocking_rate'] = (stats['blocked_packets'] / stats['total_packets']) * 100
 
         # Live rate calculations: compute packets per second between current and previous stats snapshot.
-        prev_stats_file = '/tmp/ebaf-web-prev-stats.dat'
-        current_time = time.time()
-        
-        if os.path.exists(prev_stats_file):
-            try:
-                with open(prev_stats_file, 'r') as f:
-                    prev_data = json.load(f)
-                    time_diff = current_time - prev_data['timestamp']
-                    if time_diff > 0:
-                        stats['total_rate'] = (stats['total_packets'] - prev_data['total_packets']) / time_diff
-                        stats['blocked_rate'] = (stats['blocked_packets'] - prev_data['blocked_packets']) / time_diff
-            except:
-                pass
+        # collect_stats() runs under _stats_lock, so the snapshot needs no extra locking.
+        # Monotonic time keeps rates sane across wall-clock adjustments.
+        current_time = time.monotonic()
+        prev_snapshot = DashboardHandler._prev_snapshot
+        if prev_snapshot is not None:
+            prev_time, prev_total, prev_blocked = prev_snapshot
+            time_diff = current_time - prev_time
+            if time_diff > 0:
+                stats['total_rate'] = (stats['total_packets'] - prev_total) / time_diff
+                stats['blocked_rate'] = (stats['blocked_packets'] - prev_blocked) / time_diff
 
         # Save current snapshot of stats for live rate calculation on the next iteration.
-        try:
-            with open(prev_stats_file, 'w') as f:
-                json.dump({
-                    'timestamp': current_time,
-                    'total_packets': stats['total_packets'],
-                    'blocked_packets': stats['blocked_packets']
-                }, f)
-        except:
-            pass
+        DashboardHandler._prev_snapshot = (current_time, stats['total_packets'], stats['blocked_packets'])
 
         # Get rate history for the graph
         stats['rate_history'] = self.get_rate_history(stats['blocked_rate'])
@@ -136,53 +497,20 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 
         return stats
 
-    # Helper function to get the interface with XDP program attached
-    def get_xdp_interface(self):
-        try:
-            result = subprocess.run(['ip', 'link', 'show'], capture_output=True, text=True)
-            lines = result.stdout.split('\n')
-            for i, line in enumerate(lines):
-                if 'xdp' in line.lower() and 'prog' in line.lower():
-                    # Get the interface name from the current or previous line
-                    for j in range(max(0, i-2), min(len(lines), i+2)):
-                        match = re.search(r'\d+:\s+(\w+):', lines[j])
-                        if match:
-                            return match.group(1)
-        except:
-            pass
-        return 'Unknown'
-
-    # Get rate history for time-series graph
+    # Get rate history for time-series graph.
+    # Called from collect_stats(), so _stats_lock serializes it across server threads.
     def get_rate_history(self, current_rate):
-        history_file = '/tmp/ebaf-rate-history.json'
-        history = []
-        
-        try:
-            if os.path.exists(history_file):
-                with open(history_file, 'r') as f:
-                    history = json.load(f)
-        except:
-            history = []
-        
-        # Add current rate with timestamp
-        current_time = datetime.now()
-        history.append({
-            'time': current_time.strftime("%H:%M:%S"),
+        # Add current rate with timestamp ("HH:MM:SS" taken from the cached per-second string)
+        _rate_history.append({
+            'time': _now_string()[11:],
             'rate': current_rate
         })
         
-        # Keep only last 100 data points for full graph width utilization
-        if len(history) > 100:
-            history = history[-100:]
+        # Persist occasionally so the graph survives a dashboard restart.
+        if time.monotonic() - _last_history_persist >= HISTORY_PERSIST_INTERVAL:
+            _persist_rate_history()
         
-        # Save updated history
-        try:
-            with open(history_file, 'w') as f:
-                json.dump(history, f)
-        except:
-            pass
-        
-        return history
+        return list(_rate_history)
 
     # Stub function to get recently blocked domains.
     # In a full implementation, this could extract domain names from logs or BPF statistics.
@@ -192,25 +520,26 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
         domain_stats = []
         stats_file = '/tmp/ebaf-domain-stats.dat'
         
-        if os.path.exists(stats_file):
-            try:
-                with open(stats_file, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if ':' in line:
-                            domain, drops = line.split(':', 1)
-                            try:
-                                drop_count = int(drops)
-                                if drop_count > 0:
-                                    domain_stats.append({
-                                        'domain': domain,
-                                        'drops': drop_count
-                                    })
-                            except ValueError:
-                                continue
-            except:
-                # Fallback to placeholder data if file can't be read
-                return []
+        try:
+            with open(stats_file, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if ':' in line:
+                        domain, drops = line.split(':', 1)
+                        try:
+                            drop_count = int(drops)
+                            if drop_count > 0:
+                                domain_stats.append({
+                                    'domain': domain,
+                                    'drops': drop_count
+                                })
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass  # No drops recorded yet.
+        except:
+            # Fallback to placeholder data if file can't be read
+            return []
         
         # Sort by drop count (highest first) and take top 20
         domain_stats.sort(key=lambda x: x['drops'], reverse=True)
@@ -221,107 +550,204 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
 
 
     # Generate HTML dashboard using the collected statistics.
+    # Only the dynamic section between the static head and tail is rendered here.
+    # Display-only fields are derived into a copy so they never leak into the JSON API.
     def generate_html(self, stats):
-        # Determine status display based on whether eBAF is running.
-        status_text = 'ACTIVE' if stats['running'] else 'INACTIVE'
-        
-        # Update the blocked domains section in the HTML
-        blocked_domains_html = """
-            <div class="section blocked-domains">
-                <div class="section-title">[Top Blocked Domains]</div>
-                <div class="domains-list">
-        """
+        running = stats['running']
+        view = dict(stats)
+        view['status_text'] = 'ACTIVE' if running else 'INACTIVE'
+        view['status_class'] = 'status-active' if running else 'status-inactive'
+        view['alert_hidden'] = ' hidden' if running else ''
+        view['total_text'], view['blocked_text'] = _format_counts(stats['total_packets'],
+                                                                  stats['blocked_packets'])
+        view['domains_html'] = _blocked_domains_html(tuple(stats['blocked_domains']))
+        view['rate_graph'] = _create_rate_graph(stats['rate_history'])
+        return _HTML_BODY_TEMPLATE.format_map(view)
+
+# Static page shell, encoded once at import. Only the section between head and tail
+# changes per stats snapshot; it is filled in with str.format_map().
+_HTML_HEAD = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>eBAF Terminal Dashboard</title>
+    <link rel="stylesheet" href="/static/dashboard.css">
+</head>
+<body>
+    <div class="terminal">
+        <div class="header">
+            <div class="ascii-title">
+           /$$$$$$$   /$$$$$$  /$$$$$$$$
+          | $$__  $$ /$$__  $$| $$_____/
+  /$$$$$$ | $$  \ $$| $$  \ $$| $$      
+ /$$__  $$| $$$$$$$ | $$$$$$$$| $$$$$   
+| $$$$$$$$| $$__  $$| $$__  $$| $$__/   
+| $$_____/| $$  \ $$| $$  | $$| $$      
+|  $$$$$$$| $$$$$$$/| $$  | $$| $$      
+ \_______/|_______/ |__/  |__/|__/      
+            </div>
+            <div class="tagline">⚡ DROP ADS AT THE KERNEL ⚡</div>
+        </div>
         
-        if stats['blocked_domains']:
-            for domain in stats['blocked_domains']:
-                blocked_domains_html += f'<div class="domain-item">{domain}</div>'
-        else:
-            blocked_domains_html += '<div class="no-domains">No blocks recorded</div>'
+"""
+
+_HTML_BODY_TEMPLATE = """        <div class="alert" id="alert"{alert_hidden}>⚠ ERROR: eBAF process not running! Execute: sudo ebaf ⚠</div>
         
-        blocked_domains_html += """
+        <div class="main-content">
+            <div class="section system-status">
+                <div class="section-title">[System Status]</div>
+                <div class="stats-content">
+                    <div class="status-line">
+                        <span class="label">Service:</span>
+                        <span id="status" class="{status_class}">{status_text}</span>
+                    </div>
+                    <div class="status-line">
+                        <span class="label">Interface:</span>
+                        <span id="interface" class="number-highlight">{interface}</span>
+                    </div>
+                    <div class="status-line">
+                        <span class="label">Runtime:</span>
+                        <span id="runtime" class="number-highlight">{runtime}</span>
+                    </div>
                 </div>
             </div>
-        """
-        
-        # Create clean line graph for blocked rate
-        def create_rate_graph():
-            if not stats['rate_history'] or len(stats['rate_history']) < 2:
-                return "Collecting data..."
             
-            # Find max rate for scaling, with minimum of 1 to avoid division by zero
-            max_rate = max([point['rate'] for point in stats['rate_history']] + [1])
-            
-            # Graph dimensions
-            height = 17
-            width = min(400, len(stats['rate_history']) * 2)  # Dynamic width based on data
-            
-            # Create the graph grid
-            graph_lines = []
-            
-            # Initialize empty grid
-            grid = [[' ' for _ in range(width)] for _ in range(height)]
-            
-            # Plot the line
-            data_points = stats['rate_history'][-width//2:]  # Use recent data points
-            
-            for i in range(len(data_points) - 1):
-                if i * 2 >= width - 1:
-                    break
-                    
-                # Current and next points
-                curr_rate = (data_points[i]['rate'] / max_rate) * (height - 1)
-                next_rate = (data_points[i + 1]['rate'] / max_rate) * (height - 1)
-                
-                # Draw line between points
-                x1, y1 = i * 2, int(curr_rate)
-                x2, y2 = min((i + 1) * 2, width - 1), int(next_rate)
-                
-                # Simple line drawing
-                if x1 < width and y1 < height:
-                    grid[height - 1 - y1][x1] = '●'
-                if x2 < width and y2 < height:
-                    grid[height - 1 - y2][x2] = '●'
-                
-                # Connect points with simple interpolation
-                if abs(y2 - y1) > 1:
-                    steps = abs(y2 - y1)
-                    for step in range(1, steps):
-                        interp_y = y1 + (y2 - y1) * step // steps
-                        interp_x = x1 + (x2 - x1) * step // steps
-                        if interp_x < width and 0 <= interp_y < height:
-                            grid[height - 1 - interp_y][interp_x] = '●'
-            
-            # Convert grid to strings with Y-axis
-            for row in range(height):
-                line = "█|" + ''.join(grid[row])
-                graph_lines.append(line)
+            <div class="section packet-stats">
+                <div class="section-title">[Packet Stats]</div>
+                <div class="stats-content">
+                    <div class="status-line">
+                        <span class="label">Total:</span>
+                        <span id="total" class="number-highlight">{total_text}</span>
+                    </div>
+                    <div class="status-line">
+                        <span class="label">Blocked:</span>
+                        <span id="blocked" class="number-highlight">{blocked_text}</span>
+                    </div>
+                    <div class="status-line">
+                        <span class="label">Total Rate:</span>
+                        <span id="total-rate" class="number-highlight">{total_rate:.1f}/s</span>
+                    </div>
+                    <div class="status-line">
+                        <span class="label">Block Rate:</span>
+                        <span id="blocked-rate" class="number-highlight">{blocked_rate:.1f}/s</span>
+                    </div>
+                    <div class="status-line">
+                        <span class="label">Block %:</span>
+                        <span id="blocking-rate" class="number-highlight">{blocking_rate:.1f}%</span>
+                    </div>
+                </div>
+            </div>
             
-            # Add X-axis
-            x_axis = "█+" + "█" * width
-            graph_lines.append(x_axis)
+            {domains_html}
             
-            return '\n'.join(graph_lines)
+            <div class="graph-section">
+                <div class="section-title">[Block Rate Graph - Live Time Series]</div>
+                <div class="graph" id="graph">{rate_graph}</div>
+"""
 
-        
-        rate_graph = create_rate_graph()
-        
-        # Return an HTML page that includes auto-refresh meta tag, CSS styling, and inline stats.
-        return f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>eBAF Terminal Dashboard</title>
-    <meta http-equiv="refresh" content="3">
-    <style>
-        * {{
+_HTML_TAIL = """            </div>
+        </div>
+    </div>
+    <script>
+    // Poll the JSON API every 3 seconds and patch the page in place instead of reloading it.
+    (function () {
+        function setText(id, text) {
+            document.getElementById(id).textContent = text;
+        }
+
+        // Mirrors _create_rate_graph() in ebaf_dash.py.
+        function rateGraph(history) {
+            if (!history || history.length < 2) {
+                return 'Collecting data...';
+            }
+            var maxRate = Math.max(1, Math.max.apply(null, history.map(function (p) { return p.rate; })));
+            var height = 17;
+            var width = Math.min(400, history.length * 2);
+            var grid = [];
+            for (var row = 0; row < height; row++) {
+                grid.push(new Array(width).fill(' '));
+            }
+            function plot(x, y) {
+                if (x < width && y >= 0 && y < height) {
+                    grid[height - 1 - y][x] = '●';
+                }
+            }
+            var points = history.slice(-width / 2);
+            for (var i = 0; i < points.length - 1; i++) {
+                if (i * 2 >= width - 1) {
+                    break;
+                }
+                var x1 = i * 2, y1 = Math.trunc(points[i].rate / maxRate * (height - 1));
+                var x2 = Math.min((i + 1) * 2, width - 1), y2 = Math.trunc(points[i + 1].rate / maxRate * (height - 1));
+                plot(x1, y1);
+                plot(x2, y2);
+                var steps = Math.abs(y2 - y1);
+                for (var step = 1; steps > 1 && step < steps; step++) {
+                    plot(x1 + Math.floor((x2 - x1) * step / steps), y1 + Math.floor((y2 - y1) * step / steps));
+                }
+            }
+            var lines = grid.map(function (cells) { return '█|' + cells.join(''); });
+            lines.push('█+' + '█'.repeat(width));
+            return lines.join('\\n');
+        }
+
+        function render(stats) {
+            var status = document.getElementById('status');
+            status.textContent = stats.running ? 'ACTIVE' : 'INACTIVE';
+            status.className = stats.running ? 'status-active' : 'status-inactive';
+            document.getElementById('alert').hidden = stats.running;
+            setText('interface', stats.interface);
+            setText('runtime', stats.runtime);
+            setText('total', stats.total_packets.toLocaleString('en-US'));
+            setText('blocked', stats.blocked_packets.toLocaleString('en-US'));
+            setText('total-rate', stats.total_rate.toFixed(1) + '/s');
+            setText('blocked-rate', stats.blocked_rate.toFixed(1) + '/s');
+            setText('blocking-rate', stats.blocking_rate.toFixed(1) + '%');
+            setText('graph', rateGraph(stats.rate_history));
+
+            var domains = document.getElementById('domains');
+            domains.replaceChildren();
+            stats.blocked_domains.forEach(function (domain) {
+                var item = document.createElement('div');
+                item.className = 'domain-item';
+                item.textContent = domain;
+                domains.appendChild(item);
+            });
+            if (!stats.blocked_domains.length) {
+                var empty = document.createElement('div');
+                empty.className = 'no-domains';
+                empty.textContent = 'No blocks recorded';
+                domains.appendChild(empty);
+            }
+        }
+
+        setInterval(function () {
+            fetch('/api/stats').then(function (r) { return r.json(); }).then(render).catch(function () {});
+        }, 3000);
+    })();
+    </script>
+</body>
+</html>
+"""
+_HTML_HEAD_BYTES = _HTML_HEAD.encode()
+_HTML_TAIL_BYTES = _HTML_TAIL.encode()
+
+# The head is gzipped once at import. Z_SYNC_FLUSH byte-aligns the output so each page can
+# continue the same gzip stream from a copy of this compressor, keeping the head in its window.
+_HTML_HEAD_COMPRESSOR = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container.
+_HTML_HEAD_GZIP = _HTML_HEAD_COMPRESSOR.compress(_HTML_HEAD_BYTES) + _HTML_HEAD_COMPRESSOR.flush(zlib.Z_SYNC_FLUSH)
+
+# Dashboard stylesheet, served separately so browsers cache it across page loads.
+_DASHBOARD_CSS = """
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Courier New', 'Liberation Mono', 'DejaVu Sans Mono', monospace;
             background: #000000;
             color: #ffffff;
@@ -330,9 +756,9 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             font-size: 14px;
             height: 100vh;
             overflow: hidden;
-        }}
+        }
         
-        .terminal {{
+        .terminal {
             background: #000000;
             border: 2px solid #606060;
             border-radius: 0;
@@ -342,68 +768,68 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             overflow: hidden;
             display: flex;
             flex-direction: column;
-        }}
+        }
         
-        .header {{
+        .header {
             text-align: center;
             margin-bottom: 20px;
             border-bottom: 2px solid #606060;
             padding-bottom: 20px;
             flex-shrink: 0;
-        }}
+        }
         
-        .ascii-title {{
+        .ascii-title {
             color: #ffffff;
             font-size: 16px;
             line-height: 1;
             margin-bottom: 15px;
             white-space: pre;
             font-weight: bold;
-        }}
+        }
         
-        .tagline {{
+        .tagline {
             color: #00ff00;
             font-size: 18px;
             font-weight: bold;
             margin-top: 15px;
             text-transform: uppercase;
             letter-spacing: 2px;
-        }}
+        }
         
-        .main-content {{
+        .main-content {
             flex: 1;
             display: grid;
             grid-template-columns: 1fr 1fr 1fr;
             grid-template-rows: 1fr 1fr;
             gap: 20px;
             overflow: hidden;
-        }}
+        }
         
-        .section {{
+        .section {
             border: 2px solid #606060;
             padding: 15px;
             display: flex;
             flex-direction: column;
             overflow: hidden;
             background: #0a0a0a;
-        }}
+        }
         
-        .system-status {{
+        .system-status {
             grid-column: 1;
             grid-row: 1;
-        }}
+        }
         
-        .packet-stats {{
+        .packet-stats {
             grid-column: 2;
             grid-row: 1;
-        }}
+        }
         
-        .blocked-domains {{
+        .blocked-domains {
             grid-column: 3;
             grid-row: 1 / 3;
-        }}
+        }
         
-        .graph-section {{
+        .graph-section {
             grid-column: 1 / 3;
             grid-row: 2;
             border: 2px solid #606060;
@@ -412,9 +838,9 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             display: flex;
             flex-direction: column;
             overflow: hidden;
-        }}
+        }
         
-        .section-title {{
+        .section-title {
             color: #00ff00;
             font-weight: bold;
             margin-bottom: 12px;
@@ -423,27 +849,27 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             font-size: 14px;
             flex-shrink: 0;
             text-transform: uppercase;
-        }}
+        }
         
-        .status-line {{
+        .status-line {
             display: flex;
             justify-content: space-between;
             margin: 8px 0;
             font-family: monospace;
             font-size: 13px;
-        }}
+        }
         
-        .status-active {{
+        .status-active {
             color: #00ff00;
             font-weight: bold;
-        }}
+        }
         
-        .status-inactive {{
+        .status-inactive {
             color: #ff0000;
             font-weight: bold;
-        }}
+        }
         
-        .graph {{
+        .graph {
             font-family: monospace;
             color: #00ff00;
             white-space: pre;
@@ -453,18 +879,18 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             flex: 1;
             overflow: hidden;
             font-weight: normal;
-        }}
+        }
         
-        .domains-list {{
+        .domains-list {
             flex: 1;
             overflow: hidden;
             border: 1px solid #606060;
             padding: 10px;
             background: #050505;
             overflow-y: auto;
-        }}
+        }
         
-        .domain-item {{
+        .domain-item {
             color: #ff6060;
             margin: 4px 0;
             font-family: monospace;
@@ -472,21 +898,21 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             font-weight: bold;
             padding: 2px 0;
             border-bottom: 1px solid #333;
-        }}
+        }
         
-        .domain-item:before {{
+        .domain-item:before {
             content: "▶ ";
             color: #00ff00;
-        }}
+        }
         
-        .no-domains {{
+        .no-domains {
             color: #808080;
             font-style: italic;
             text-align: center;
             padding: 20px;
-        }}
+        }
         
-        .alert {{
+        .alert {
             background: #330000;
             border: 2px solid #ff0000;
             color: #ff6060;
@@ -495,178 +921,234 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             text-align: center;
             font-weight: bold;
             text-transform: uppercase;
-        }}
+        }
         
-        .number-highlight {{
+        .number-highlight {
             color: #00ff00;
             font-weight: bold;
-        }}
+        }
         
-        .stats-content {{
+        .stats-content {
             flex: 1;
             overflow: hidden;
-        }}
+        }
         
         /* Hide scrollbars completely except for domains list */
-        ::-webkit-scrollbar {{
+        ::-webkit-scrollbar {
             width: 6px;
-        }}
+        }
         
-        ::-webkit-scrollbar-track {{
+        ::-webkit-scrollbar-track {
             background: #000000;
-        }}
+        }
         
-        ::-webkit-scrollbar-thumb {{
+        ::-webkit-scrollbar-thumb {
             background: #606060;
             border-radius: 3px;
-        }}
+        }
         
-        ::-webkit-scrollbar-thumb:hover {{
+        ::-webkit-scrollbar-thumb:hover {
             background: #808080;
-        }}
+        }
         
-        .label {{
+        .label {
             color: #c0c0c0;
-        }}
+        }
         
-        @media (max-width: 1200px) {{
-            .main-content {{
+        @media (max-width: 1200px) {
+            .main-content {
                 grid-template-columns: 1fr 1fr;
                 grid-template-rows: auto auto auto;
-            }}
+            }
             
-            .system-status {{
+            .system-status {
                 grid-column: 1;
                 grid-row: 1;
-            }}
+            }
             
-            .packet-stats {{
+            .packet-stats {
                 grid-column: 2;
                 grid-row: 1;
-            }}
+            }
             
-            .blocked-domains {{
+            .blocked-domains {
                 grid-column: 1 / 3;
                 grid-row: 2;
-            }}
+            }
             
-            .graph-section {{
+            .graph-section {
                 grid-column: 1 / 3;
                 grid-row: 3;
-            }}
-        }}
+            }
+        }
         
-        @media (max-width: 800px) {{
-            .main-content {{
+        @media (max-width: 800px) {
+            .main-content {
                 grid-template-columns: 1fr;
                 grid-template-rows: auto auto auto auto;
-            }}
+            }
             
-            .system-status {{
+            .system-status {
                 grid-column: 1;
                 grid-row: 1;
-            }}
+            }
             
-            .packet-stats {{
+            .packet-stats {
                 grid-column: 1;
                 grid-row: 2;
-            }}
+            }
             
-            .blocked-domains {{
+            .blocked-domains {
                 grid-column: 1;
                 grid-row: 3;
-            }}
+            }
             
-            .graph-section {{
+            .graph-section {
                 grid-column: 1;
                 grid-row: 4;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="terminal">
-        <div class="header">
-            <div class="ascii-title">
-           /$$$$$$$   /$$$$$$  /$$$$$$$$
-          | $$__  $$ /$$__  $$| $$_____/
-  /$$$$$$ | $$  \ $$| $$  \ $$| $$      
- /$$__  $$| $$$$$$$ | $$$$$$$$| $$$$$   
-| $$$$$$$$| $$__  $$| $$__  $$| $$__/   
-| $$_____/| $$  \ $$| $$  | $$| $$      
-|  $$$$$$$| $$$$$$$/| $$  | $$| $$      
- \_______/|_______/ |__/  |__/|__/      
-            </div>
-            <div class="tagline">⚡ DROP ADS AT THE KERNEL ⚡</div>
-        </div>
-        
-        {'<div class="alert">⚠ ERROR: eBAF process not running! Execute: sudo ebaf ⚠</div>' if not stats['running'] else ''}
-        
-        <div class="main-content">
-            <div class="section system-status">
-                <div class="section-title">[System Status]</div>
-                <div class="stats-content">
-                    <div class="status-line">
-                        <span class="label">Service:</span>
-                        <span class="{'status-active' if stats['running'] else 'status-inactive'}">{status_text}</span>
-                    </div>
-                    <div class="status-line">
-                        <span class="label">Interface:</span>
-                        <span class="number-highlight">{stats['interface']}</span>
-                    </div>
-                    <div class="status-line">
-                        <span class="label">Runtime:</span>
-                        <span class="number-highlight">{stats['runtime']}</span>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="section packet-stats">
-                <div class="section-title">[Packet Stats]</div>
-                <div class="stats-content">
-                    <div class="status-line">
-                        <span class="label">Total:</span>
-                        <span class="number-highlight">{stats['total_packets']:,}</span>
-                    </div>
-                    <div class="status-line">
-                        <span class="label">Blocked:</span>
-                        <span class="number-highlight">{stats['blocked_packets']:,}</span>
-                    </div>
-                    <div class="status-line">
-                        <span class="label">Total Rate:</span>
-                        <span class="number-highlight">{stats['total_rate']:.1f}/s</span>
-                    </div>
-                    <div class="status-line">
-                        <span class="label">Block Rate:</span>
-                        <span class="number-highlight">{stats['blocked_rate']:.1f}/s</span>
-                    </div>
-                    <div class="status-line">
-                        <span class="label">Block %:</span>
-                        <span class="number-highlight">{stats['blocking_rate']:.1f}%</span>
-                    </div>
+            }
+        }
+"""
+_CSS_BYTES = _DASHBOARD_CSS.encode()
+_CSS_GZIP = gzip.compress(_CSS_BYTES, compresslevel=9)
+_CSS_ETAG = '"' + hashlib.sha1(_CSS_BYTES).hexdigest() + '"'
+# The gzip bytes differ from the identity bytes, so a strong tag must differ too.
+_CSS_GZIP_ETAG = _CSS_ETAG[:-1] + '-gzip"'
+
+# Thousands-separated packet counts. The counters only move when the adblocker rewrites its
+# stats file, so the last pair is memoized and reformatted only when either value changes.
+@functools.lru_cache(maxsize=1)
+def _format_counts(total_packets, blocked_packets):
+    return f'{total_packets:,}', f'{blocked_packets:,}'
+
+# Build the "Top Blocked Domains" section. The list only changes when the adblocker
+# records new drops, so the last fragment is memoized and rebuilt only on change.
+@functools.lru_cache(maxsize=1)
+def _blocked_domains_html(blocked_domains):
+    if blocked_domains:
+        items = ''.join(f'<div class="domain-item">{domain}</div>' for domain in blocked_domains)
+    else:
+        items = '<div class="no-domains">No blocks recorded</div>'
+    return f"""
+            <div class="section blocked-domains">
+                <div class="section-title">[Top Blocked Domains]</div>
+                <div class="domains-list" id="domains">
+        {items}
                 </div>
             </div>
+        """
+
+# Render the blocked-rate history as a clean ASCII line graph.
+def _create_rate_graph(rate_history):
+    if not rate_history or len(rate_history) < 2:
+        return "Collecting data..."
+    
+    # Find max rate for scaling, with minimum of 1 to avoid division by zero
+    max_rate = max([point['rate'] for point in rate_history] + [1])
+    
+    # Graph dimensions
+    height = 17
+    width = min(400, len(rate_history) * 2)  # Dynamic width based on data
+    
+    # Plot the line
+    data_points = rate_history[-width//2:]  # Use recent data points
+    if np is not None:
+        rows = _plot_rate_rows_numpy(data_points, max_rate, height, width)
+    else:
+        rows = _plot_rate_rows(data_points, max_rate, height, width)
+    
+    # Convert grid to strings with Y-axis
+    graph_lines = ["█|" + row for row in rows]
+    
+    # Add X-axis
+    x_axis = "█+" + "█" * width
+    graph_lines.append(x_axis)
+    
+    return '\n'.join(graph_lines)
+
+# Byte marking a plotted cell in the bytearray rows of _plot_rate_rows().
+_GRAPH_MARK = 0x01
+
+# Plot the rate line into `height` rows of `width` characters, one point every two columns.
+def _plot_rate_rows(data_points, max_rate, height, width):
+    # Initialize empty grid: one bytearray per row, with plotted cells set to a single marker
+    # byte that is expanded to '●' once per row, instead of a list of 1-char strings.
+    grid = [bytearray(b' ' * width) for _ in range(height)]
+    
+    for i in range(len(data_points) - 1):
+        if i * 2 >= width - 1:
+            break
             
-            {blocked_domains_html}
-            
-            <div class="graph-section">
-                <div class="section-title">[Block Rate Graph - Live Time Series]</div>
-                <div class="graph">{rate_graph}</div>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-"""
+        # Current and next points
+        curr_rate = (data_points[i]['rate'] / max_rate) * (height - 1)
+        next_rate = (data_points[i + 1]['rate'] / max_rate) * (height - 1)
+        
+        # Draw line between points
+        x1, y1 = i * 2, int(curr_rate)
+        x2, y2 = min((i + 1) * 2, width - 1), int(next_rate)
+        
+        # Simple line drawing (rates go negative when the adblocker restarts its counters)
+        if x1 < width and 0 <= y1 < height:
+            grid[height - 1 - y1][x1] = _GRAPH_MARK
+        if x2 < width and 0 <= y2 < height:
+            grid[height - 1 - y2][x2] = _GRAPH_MARK
+        
+        # Connect points with simple interpolation
+        if abs(y2 - y1) > 1:
+            steps = abs(y2 - y1)
+            for step in range(1, steps):
+                interp_y = y1 + (y2 - y1) * step // steps
+                interp_x = x1 + (x2 - x1) * step // steps
+                if interp_x < width and 0 <= interp_y < height:
+                    grid[height - 1 - interp_y][interp_x] = _GRAPH_MARK
+    
+    return [row.decode('ascii').replace('\x01', '●') for row in grid]
+
+# NumPy version of _plot_rate_rows(): computes every point and interpolation step as arrays
+# and plots them with a single fancy-indexing assignment.
+def _plot_rate_rows_numpy(data_points, max_rate, height, width):
+    rates = np.fromiter((point['rate'] for point in data_points), dtype=np.float64, count=len(data_points))
+    # Only segments starting before the last column are drawn.
+    segments = min(len(rates) - 1, width // 2)
+    ys = (rates[:segments + 1] / max_rate * (height - 1)).astype(np.int64)  # Truncates like int().
+    xs = np.minimum(np.arange(segments + 1) * 2, width - 1)
+
+    # Interpolation steps 1..|dy|-1 for every segment whose endpoints are more than one row apart.
+    y1, dy = ys[:-1], np.diff(ys)
+    x1, dx = xs[:-1], np.diff(xs)
+    steps = np.abs(dy)
+    counts = np.where(steps > 1, steps - 1, 0)
+    segment = np.repeat(np.arange(segments), counts)
+    step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    interp_y = y1[segment] + dy[segment] * step // steps[segment]
+    interp_x = x1[segment] + dx[segment] * step // steps[segment]
+
+    plot_x = np.concatenate((xs, interp_x))
+    plot_y = np.concatenate((ys, interp_y))
+    visible = (plot_y >= 0) & (plot_y < height) & (plot_x < width)
+
+    grid = np.full((height, width), ' ', dtype='<U1')
+    grid[height - 1 - plot_y[visible], plot_x[visible]] = '●'
+    return grid.view(f'<U{width}').ravel().tolist()
+
+# Threaded HTTP server so a slow request never stalls other dashboard clients.
+class DashboardServer(http.server.ThreadingHTTPServer):
+    allow_reuse_address = True  # Allow quick restarts on the same port.
+    daemon_threads = True       # Don't block shutdown on open keep-alive connections.
 
 # Start the dashboard server on a specified port.
 def start_dashboard(port=8080):
     """Start the dashboard server"""
     global DASHBOARD_START_TIME
     DASHBOARD_START_TIME = time.time()  # Record start time
+    _load_rate_history()
+    atexit.register(_persist_rate_history)
+    atexit.register(_flush_access_log)
     
     try:
-        with socketserver.TCPServer(("", port), DashboardHandler) as httpd:
+        with DashboardServer(("", port), DashboardHandler) as httpd:
+            threading.Thread(target=_refresh_loop, daemon=True).start()
+            threading.Thread(target=_log_flush_loop, daemon=True).start()
             print(f"eBAF Dashboard server running on http://localhost:{port}")
             print("Press Ctrl+C to stop...")
             httpd.serve_forever()
@@ -680,7 +1162,6 @@ def start_dashboard(port=8080):
             print(f"Error starting server: {e}")
 
 if __name__ == "__main__":
-    import sys
     port = 8080
     # Allow the port to be customized via command-line argument.
     if len(sys.argv) > 1:
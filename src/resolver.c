@@ -1,6 +1,9 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <ctype.h>
+#include <unistd.h>
+#include <fcntl.h>
 #include <sys/types.h>
 #include <sys/socket.h>
 #include <netdb.h>
@@ -8,6 +11,10 @@
 #include <bpf/bpf.h>
 #include <pthread.h>
 #include <fnmatch.h>
+#include <regex.h>
+#include <sys/stat.h>
+#include <sys/file.h>
+#include <time.h>
 #include <linux/in6.h>
 
 #include "adblocker.h"
@@ -17,10 +24,51 @@ static struct domain_entry *domains = NULL;
 static int domain_count = 0;
 static pthread_mutex_t domain_mutex = PTHREAD_MUTEX_INITIALIZER;
 
+// Open-addressing hash index over domains[] (slot holds index + 1, 0 = empty), so duplicate
+// checks and lookups by name don't scan the whole store. Kept under half full.
+#define DOMAIN_INDEX_SIZE 32768
+static int *domain_index = NULL;
+
+// /tmp/ebaf-domain-stats.dat, opened once and rewritten in place on every stats tick.
+static int domain_stats_fd = -1;
+
 static char **whitelist_patterns = NULL;
 static int whitelist_pattern_count = 0;
 static pthread_mutex_t whitelist_mutex = PTHREAD_MUTEX_INITIALIZER;
 
+// Whitelist patterns indexed by their labels in reverse order ("i.scdn.co" -> co, scdn, i), so a
+// lookup costs one step per label of the domain instead of one fnmatch() per pattern.
+struct whitelist_node {
+    char *label;
+    struct whitelist_node *child;   // First child.
+    struct whitelist_node *next;    // Next sibling.
+    int exact;                      // A literal pattern ends here.
+    int wildcard_labels;            // Labels a "*." pattern needs below this node; 0 if none.
+};
+
+static struct whitelist_node whitelist_root;
+
+// Patterns the trie cannot represent (wildcards inside a label, '?', '[...]'), matched with fnmatch().
+static char **whitelist_globs = NULL;
+static int whitelist_glob_count = 0;
+
+// All of whitelist_globs translated into one anchored POSIX regex alternation, so a domain is
+// checked against every glob in a single regexec() pass. Falls back to fnmatch() if unavailable.
+static regex_t whitelist_glob_regex;
+static int whitelist_glob_regex_ready = 0;
+
+static void whitelist_trie_free(struct whitelist_node *node) {
+    struct whitelist_node *c = node->child;
+    while (c != NULL) {
+        struct whitelist_node *next = c->next;
+        whitelist_trie_free(c);
+        free(c->label);
+        free(c);
+        c = next;
+    }
+    node->child = NULL;
+}
+
 static void init_domain_ips(struct domain_entry *entry) {
     entry->resolved_ipv4 = malloc(sizeof(__u32) * 4);
     entry->ipv4_capacity = 4;
@@ -31,6 +79,14 @@ static void init_domain_ips(struct domain_entry *entry) {
     entry->ipv6_count = 0;
     
     entry->total_drops = 0;
+    entry->expires = 0;
+}
+
+static void free_domain_ips(struct domain_entry *entry) {
+    free(entry->resolved_ipv4);
+    free(entry->resolved_ipv6);
+    entry->resolved_ipv4 = NULL;
+    entry->resolved_ipv6 = NULL;
 }
 
 static int add_ipv4_to_domain(struct domain_entry *entry, __u32 ip) {
@@ -57,31 +113,59 @@ static int add_ipv6_to_domain(struct domain_entry *entry, struct in6_addr ip) {
     return 0;
 }
 
+// Copy a domain name lower-cased (DNS names are case-insensitive), truncated to fit `size`.
+static void lowercase_copy(char *dst, const char *src, size_t size) {
+    size_t i = 0;
+    for (; src[i] && i < size - 1; i++) dst[i] = tolower((unsigned char)src[i]);
+    dst[i] = '\0';
+}
+
+// FNV-1a over the stored (possibly truncated) form of the domain.
+static unsigned int domain_hash(const char *domain) {
+    unsigned int h = 2166136261u;
+    for (int i = 0; domain[i] && i < DOMAIN_MAX_SIZE - 1; i++) {
+        h = (h ^ (unsigned char)domain[i]) * 16777619u;
+    }
+    return h;
+}
+
+// Return the index slot holding `domain`, or the empty slot where it would be inserted.
+static int *domain_index_slot(const char *domain) {
+    unsigned int h = domain_hash(domain) & (DOMAIN_INDEX_SIZE - 1);
+    while (domain_index[h] != 0 &&
+           strncmp(domains[domain_index[h] - 1].domain, domain, DOMAIN_MAX_SIZE - 1) != 0) {
+        h = (h + 1) & (DOMAIN_INDEX_SIZE - 1);
+    }
+    return &domain_index[h];
+}
+
 void domain_store_init(void) {
     pthread_mutex_lock(&domain_mutex);
     if (domains == NULL) {
         domains = calloc(MAX_DOMAINS, sizeof(struct domain_entry));
+        domain_index = calloc(DOMAIN_INDEX_SIZE, sizeof(int));
         domain_count = 0;
     }
     pthread_mutex_unlock(&domain_mutex);
 }
 
-int domain_store_add(const char *domain) {
-    if (!domains) return -1;
+int domain_store_add(const char *name) {
+    if (!domains || !domain_index) return -1;
+    char domain[DOMAIN_MAX_SIZE];
+    lowercase_copy(domain, name, sizeof(domain));  // Stored lower-cased so the whitelist needn't fold case.
     pthread_mutex_lock(&domain_mutex);
-    for (int i = 0; i < domain_count; i++) {
-        if (strcmp(domains[i].domain, domain) == 0) {
-            pthread_mutex_unlock(&domain_mutex);
-            return 0;
-        }
+    int *slot = domain_index_slot(domain);
+    if (*slot != 0) {
+        pthread_mutex_unlock(&domain_mutex);
+        return 0;
     }
     if (domain_count >= MAX_DOMAINS) {
         pthread_mutex_unlock(&domain_mutex);
         return -1;
     }
-    strncpy(domains[domain_count].domain, domain, DOMAIN_MAX_SIZE - 1);
-    domains[domain_count].domain[DOMAIN_MAX_SIZE - 1] = '\0';
+    memcpy(domains[domain_count].domain, domain, strlen(domain) + 1);
     domain_count++;
+    *slot = domain_count;
     init_domain_ips(&domains[domain_count - 1]);
     pthread_mutex_unlock(&domain_mutex);
     return 0;
@@ -93,13 +177,18 @@ void domain_store_cleanup(void) {
     pthread_mutex_lock(&domain_mutex);
     if (domains) {
         for (int i = 0; i < domain_count; i++) {
-            if (domains[i].resolved_ipv4) free(domains[i].resolved_ipv4);
-            if (domains[i].resolved_ipv6) free(domains[i].resolved_ipv6);
+            free_domain_ips(&domains[i]);
         }
         free(domains);
         domains = NULL;
+        free(domain_index);
+        domain_index = NULL;
         domain_count = 0;
     }
+    if (domain_stats_fd >= 0) {
+        close(domain_stats_fd);
+        domain_stats_fd = -1;
+    }
     pthread_mutex_unlock(&domain_mutex);
     
     pthread_mutex_lock(&whitelist_mutex);
@@ -108,59 +197,242 @@ void domain_store_cleanup(void) {
         free(whitelist_patterns);
         whitelist_patterns = NULL;
         whitelist_pattern_count = 0;
+        free(whitelist_globs);
+        whitelist_globs = NULL;
+        whitelist_glob_count = 0;
+        if (whitelist_glob_regex_ready) {
+            regfree(&whitelist_glob_regex);
+            whitelist_glob_regex_ready = 0;
+        }
+        whitelist_trie_free(&whitelist_root);
     }
     pthread_mutex_unlock(&whitelist_mutex);
 }
 
-static int resolve_domain_to_ip(const char *domain, int map_fd_v4, int map_fd_v6) {
+// Look up a domain and record its addresses (and DNS cache expiry) on the entry.
+// Lookups made and lookups that succeeded this run, updated atomically by the resolver threads.
+// A resolver that is not reachable yet (e.g. early boot) also answers EAI_NONAME, so negative
+// results are only trusted if some lookup in the same run succeeded.
+static int lookups_attempted = 0;
+static int lookups_succeeded = 0;
+
+static int resolve_domain(struct domain_entry *entry) {
     struct addrinfo hints, *res, *p;
     memset(&hints, 0, sizeof hints);
     hints.ai_family = AF_UNSPEC; // Allow IPv4 or IPv6
     hints.ai_socktype = SOCK_STREAM;
 
-    if (getaddrinfo(domain, NULL, &hints, &res) != 0) {
-        return -1;
-    }
-
-    struct domain_entry *entry = NULL;
-    for (int i = 0; i < domain_count; i++) {
-        if (strcmp(domains[i].domain, domain) == 0) {
-            entry = &domains[i];
-            break;
+    __atomic_fetch_add(&lookups_attempted, 1, __ATOMIC_RELAXED);
+    int err = getaddrinfo(entry->domain, NULL, &hints, &res);
+    if (err != 0) {
+        // Remember domains that do not exist, so restarts don't wait on them again. Temporary
+        // failures (e.g. no network yet) are retried next time.
+        if (err == EAI_NONAME
+#ifdef EAI_NODATA
+            || err == EAI_NODATA
+#endif
+           ) {
+            entry->expires = time(NULL) + DNS_NEGATIVE_TTL_SEC;
         }
-    }
-    if (!entry) {
-        freeaddrinfo(res);
         return -1;
     }
     
-    __u64 value = 0;
-
     for(p = res; p != NULL; p = p->ai_next) {
         if (p->ai_family == AF_INET) {
             struct sockaddr_in *ipv4 = (struct sockaddr_in *)p->ai_addr;
-            __u32 ip = ipv4->sin_addr.s_addr; // Already in network byte order
-            add_ipv4_to_domain(entry, ip);
-            bpf_map_update_elem(map_fd_v4, &ip, &value, BPF_ANY);
+            add_ipv4_to_domain(entry, ipv4->sin_addr.s_addr); // Already in network byte order
         } else if (p->ai_family == AF_INET6) {
             struct sockaddr_in6 *ipv6 = (struct sockaddr_in6 *)p->ai_addr;
-            struct in6_addr ip6 = ipv6->sin6_addr; // Already in network byte order
-            add_ipv6_to_domain(entry, ip6);
-            bpf_map_update_elem(map_fd_v6, &ip6, &value, BPF_ANY);
+            add_ipv6_to_domain(entry, ipv6->sin6_addr); // Already in network byte order
         }
     }
     
     freeaddrinfo(res);
+    entry->expires = time(NULL) + DNS_CACHE_TTL_SEC;
+    __atomic_fetch_add(&lookups_succeeded, 1, __ATOMIC_RELAXED);
     return 0;
 }
 
-int domain_store_resolve_all(int map_fd_v4, int map_fd_v6) {
+static struct domain_entry *find_domain_entry(const char *domain) {
+    int index = *domain_index_slot(domain);
+    return index ? &domains[index - 1] : NULL;
+}
+
+// Load addresses resolved by a previous run. Each line of DNS_CACHE_FILE is
+// "<domain> <expires> <address>...", addresses in inet_ntop() text form; a line without
+// addresses is a domain that did not resolve. Set EBAF_IGNORE_DNS_CACHE=1 to resolve everything.
+static void dns_cache_load(void) {
+    static int loaded = 0;
+    if (loaded || !domain_index) return;  // Both the whitelist and the blacklist pass need it; read it once.
+    loaded = 1;
+
+    const char *ignore = getenv("EBAF_IGNORE_DNS_CACHE");
+    if (ignore && strcmp(ignore, "1") == 0) return;
+
+    FILE *fp = fopen(DNS_CACHE_FILE, "r");
+    if (!fp) return;
+    char iobuf[LIST_IO_BUFFER_SIZE];
+    setvbuf(fp, iobuf, _IOFBF, sizeof(iobuf));
+
+    time_t now = time(NULL);
+    char line[4096];
+    while (fgets(line, sizeof(line), fp)) {
+        char *saveptr;
+        char *domain = strtok_r(line, " \n", &saveptr);
+        char *expires = strtok_r(NULL, " \n", &saveptr);
+        if (!domain || !expires) continue;
+
+        struct domain_entry *entry = find_domain_entry(domain);
+        time_t until = (time_t)strtoll(expires, NULL, 10);
+        if (!entry || until <= now) continue;
+
+        char *addr;
+        while ((addr = strtok_r(NULL, " \n", &saveptr)) != NULL) {
+            // Only IPv6 text contains ':', so each address is parsed once, for its own family.
+            if (strchr(addr, ':') == NULL) {
+                __u32 ip;
+                if (inet_pton(AF_INET, addr, &ip) == 1) add_ipv4_to_domain(entry, ip);
+            } else {
+                struct in6_addr ip6;
+                if (inet_pton(AF_INET6, addr, &ip6) == 1) add_ipv6_to_domain(entry, ip6);
+            }
+        }
+        entry->expires = until;
+    }
+    fclose(fp);
+}
+
+// Write every resolved domain back to DNS_CACHE_FILE, replacing it atomically.
+// Entries without addresses (nonexistent domains) are dropped if every lookup this run failed.
+static void dns_cache_save(void) {
+    int keep_negative = lookups_attempted == 0 || lookups_succeeded > 0;
+    mkdir(DNS_CACHE_DIR, 0755);
+    // ebaf.sh starts one adblocker per interface, and they all save at about the same time:
+    // each writes its own temp file, and the lock serializes the write-and-rename.
+    int lock_fd = open(DNS_CACHE_LOCK_FILE, O_RDWR | O_CREAT | O_CLOEXEC, 0644);
+    if (lock_fd < 0) return;
+    if (flock(lock_fd, LOCK_EX) != 0) {
+        close(lock_fd);
+        return;
+    }
+    char tmp_file[sizeof(DNS_CACHE_FILE) + 32];
+    snprintf(tmp_file, sizeof(tmp_file), "%s.tmp.%d", DNS_CACHE_FILE, (int)getpid());
+    FILE *fp = fopen(tmp_file, "w");
+    if (!fp) {
+        close(lock_fd);  // Closing the descriptor releases the lock.
+        return;
+    }
+    char iobuf[LIST_IO_BUFFER_SIZE];
+    setvbuf(fp, iobuf, _IOFBF, sizeof(iobuf));
+
+    char addr[INET6_ADDRSTRLEN];
     for (int i = 0; i < domain_count; i++) {
-        resolve_domain_to_ip(domains[i].domain, map_fd_v4, map_fd_v6);
+        struct domain_entry *entry = &domains[i];
+        if (entry->expires == 0) continue;
+        if (!keep_negative && entry->ipv4_count == 0 && entry->ipv6_count == 0) continue;
+        fprintf(fp, "%s %lld", entry->domain, (long long)entry->expires);
+        for (int j = 0; j < entry->ipv4_count; j++) {
+            if (inet_ntop(AF_INET, &entry->resolved_ipv4[j], addr, sizeof(addr))) fprintf(fp, " %s", addr);
+        }
+        for (int j = 0; j < entry->ipv6_count; j++) {
+            if (inet_ntop(AF_INET6, &entry->resolved_ipv6[j], addr, sizeof(addr))) fprintf(fp, " %s", addr);
+        }
+        fputc('\n', fp);
+    }
+    if (fclose(fp) == 0) {
+        rename(tmp_file, DNS_CACHE_FILE);
+    } else {
+        remove(tmp_file);
+    }
+    close(lock_fd);
+}
+
+// Parse an entry that is an IP literal rather than a name (AI_NUMERICHOST's job, without going
+// through getaddrinfo()). Returns 1 if the address was recorded, 0 if a lookup is needed.
+static int parse_ip_literal(struct domain_entry *entry) {
+    __u32 ip;
+    struct in6_addr ip6;
+    if (inet_pton(AF_INET, entry->domain, &ip) == 1) {
+        add_ipv4_to_domain(entry, ip);
+        return 1;
+    }
+    if (strchr(entry->domain, ':') != NULL && inet_pton(AF_INET6, entry->domain, &ip6) == 1) {
+        add_ipv6_to_domain(entry, ip6);
+        return 1;
     }
     return 0;
 }
 
+// Make sure an entry's addresses are known, looking the domain up only if they are neither
+// fresh in the DNS cache nor an IP literal. Both the whitelist and the blacklist pass go through
+// here, so a domain on both lists is looked up once per run. Returns -1 if resolution failed.
+static int ensure_domain_resolved(struct domain_entry *entry, time_t now) {
+    if (entry->expires > now || parse_ip_literal(entry)) return 0;
+    return resolve_domain(entry);
+}
+
+// Push the addresses known for a domain into a pair of IPv4/IPv6 maps.
+static void push_domain_ips(struct domain_entry *entry, int map_fd_v4, int map_fd_v6, __u64 value) {
+    for (int i = 0; i < entry->ipv4_count; i++) {
+        bpf_map_update_elem(map_fd_v4, &entry->resolved_ipv4[i], &value, BPF_ANY);
+    }
+    for (int i = 0; i < entry->ipv6_count; i++) {
+        bpf_map_update_elem(map_fd_v6, &entry->resolved_ipv6[i], &value, BPF_ANY);
+    }
+}
+
+// Shared work queue for the resolver threads: each worker claims the next unresolved domain.
+struct resolve_job {
+    int map_fd_v4;
+    int map_fd_v6;
+    time_t now;
+    int next;
+    pthread_mutex_t lock;
+};
+
+static void *resolve_worker(void *arg) {
+    struct resolve_job *job = arg;
+    while (1) {
+        pthread_mutex_lock(&job->lock);
+        int i = job->next++;
+        pthread_mutex_unlock(&job->lock);
+        if (i >= domain_count) break;
+        // Each entry is owned by exactly one worker, so its IP lists need no extra locking.
+        if (ensure_domain_resolved(&domains[i], job->now) == 0) {
+            push_domain_ips(&domains[i], job->map_fd_v4, job->map_fd_v6, 0);
+        }
+    }
+    return NULL;
+}
+
+// getaddrinfo() blocks for a full DNS round-trip, so resolve up to RESOLVER_THREADS domains
+// concurrently instead of one after another. Domains still fresh in the DNS cache (including
+// ones known not to exist) skip resolution entirely, so restarts only hit the network for
+// stale or new entries.
+int domain_store_resolve_all(int map_fd_v4, int map_fd_v6) {
+    dns_cache_load();
+    struct resolve_job job = { map_fd_v4, map_fd_v6, time(NULL), 0, PTHREAD_MUTEX_INITIALIZER };
+    pthread_t threads[RESOLVER_THREADS];
+    int nthreads = domain_count < RESOLVER_THREADS ? domain_count : RESOLVER_THREADS;
+    int started = 0;
+
+    for (int i = 0; i < nthreads; i++) {
+        if (pthread_create(&threads[started], NULL, resolve_worker, &job) == 0) {
+            started++;
+        }
+    }
+    // Fall back to resolving on this thread if no worker could be started.
+    if (started == 0) {
+        resolve_worker(&job);
+    }
+    for (int i = 0; i < started; i++) {
+        pthread_join(threads[i], NULL);
+    }
+    pthread_mutex_destroy(&job.lock);
+    dns_cache_save();
+    return 0;
+}
+
 void domain_store_update_drop_counts(int map_fd_v4, int map_fd_v6) {
     pthread_mutex_lock(&domain_mutex);
     for (int i = 0; i < domain_count; i++) {
@@ -186,35 +458,192 @@ void domain_store_update_drop_counts(int map_fd_v4, int map_fd_v6) {
     pthread_mutex_unlock(&domain_mutex);
 }
 
+// Format the whole file in memory and hand it to the kernel with a single pwrite().
 void domain_store_write_stats_file(void) {
     const char *stats_file = "/tmp/ebaf-domain-stats.dat";    
+    char *buf = NULL;
+    size_t len = 0;
+    FILE *mem = open_memstream(&buf, &len);
+    if (!mem) return;
+
     pthread_mutex_lock(&domain_mutex);    
-    FILE *fp = fopen(stats_file, "w");
-    if (!fp) {
-        pthread_mutex_unlock(&domain_mutex);
-        return;
-    }
     for (int i = 0; i < domain_count; i++) {
         if (domains[i].total_drops > 0) {
-            fprintf(fp, "%s:%llu\n", domains[i].domain, domains[i].total_drops);
+            fprintf(mem, "%s:%llu\n", domains[i].domain, domains[i].total_drops);
+        }
+    }
+    if (fclose(mem) == 0) {
+        // Writes to a deleted file still succeed, so reopen if it was unlinked (e.g. by make clean).
+        struct stat st;
+        if (domain_stats_fd >= 0 && fstat(domain_stats_fd, &st) == 0 && st.st_nlink == 0) {
+            close(domain_stats_fd);
+            domain_stats_fd = -1;
+        }
+        if (domain_stats_fd < 0) {
+            domain_stats_fd = open(stats_file, O_WRONLY | O_CREAT | O_CLOEXEC, 0644);
+        }
+        if (domain_stats_fd >= 0 &&
+            (pwrite(domain_stats_fd, buf, len, 0) != (ssize_t)len || ftruncate(domain_stats_fd, len) != 0)) {
+            close(domain_stats_fd);  // Reopen on the next tick.
+            domain_stats_fd = -1;
         }
     }
-    fclose(fp);
     pthread_mutex_unlock(&domain_mutex);
+    free(buf);
 }
 
-int whitelist_domain_matches(const char *domain) {
-    pthread_mutex_lock(&whitelist_mutex);
-    for (int i = 0; i < whitelist_pattern_count; i++) {
-        if (fnmatch(whitelist_patterns[i], domain, 0) == 0) {
-            pthread_mutex_unlock(&whitelist_mutex);
-            return 1;
+static struct whitelist_node *whitelist_find_child(struct whitelist_node *node, const char *label, size_t len) {
+    for (struct whitelist_node *c = node->child; c != NULL; c = c->next) {
+        if (strlen(c->label) == len && memcmp(c->label, label, len) == 0) return c;
+    }
+    return NULL;
+}
+
+// Add a pattern to the trie. Handles literal domains and literal domains behind one or more
+// leading "*." (fnmatch's '*' also matches dots, so "*.x.com" matches any deeper subdomain).
+// Returns -1 if the pattern needs fnmatch().
+static int whitelist_trie_insert(const char *pattern) {
+    int wildcard_labels = 0;
+    while (strncmp(pattern, "*.", 2) == 0) {
+        wildcard_labels++;
+        pattern += 2;
+    }
+    if (pattern[0] == '\0' || strpbrk(pattern, "*?[\\") != NULL) return -1;
+
+    struct whitelist_node *node = &whitelist_root;
+    size_t end = strlen(pattern);
+    while (1) {
+        size_t start = end;
+        while (start > 0 && pattern[start - 1] != '.') start--;
+
+        struct whitelist_node *child = whitelist_find_child(node, pattern + start, end - start);
+        if (!child) {
+            child = calloc(1, sizeof(*child));
+            if (!child) return -1;
+            child->label = strndup(pattern + start, end - start);
+            child->next = node->child;
+            node->child = child;
         }
+        node = child;
+        if (start == 0) break;
+        end = start - 1;
+    }
+
+    if (wildcard_labels == 0) {
+        node->exact = 1;
+    } else if (node->wildcard_labels == 0 || wildcard_labels < node->wildcard_labels) {
+        node->wildcard_labels = wildcard_labels;
+    }
+    return 0;
+}
+
+static int whitelist_trie_matches(const char *domain) {
+    int labels = 1;
+    for (const char *c = domain; *c; c++) {
+        if (*c == '.') labels++;
+    }
+
+    struct whitelist_node *node = &whitelist_root;
+    size_t end = strlen(domain);
+    int consumed = 0;
+    while (1) {
+        if (node->wildcard_labels && labels - consumed >= node->wildcard_labels) return 1;
+        if (consumed == labels) return node->exact;
+
+        size_t start = end;
+        while (start > 0 && domain[start - 1] != '.') start--;
+        node = whitelist_find_child(node, domain + start, end - start);
+        if (!node) return 0;
+        consumed++;
+        end = start > 0 ? start - 1 : 0;
+    }
+}
+
+// Append the POSIX ERE equivalent of an fnmatch() glob (flags 0) to `out`, which must have
+// room for 4 * strlen(glob) bytes. Returns the end of the output, or NULL if the glob uses a
+// bracket expression that cannot be carried over unchanged.
+static char *glob_to_regex(const char *glob, char *out) {
+    for (const char *c = glob; *c; c++) {
+        if (*c == '*') {
+            *out++ = '.';
+            *out++ = '*';
+        } else if (*c == '?') {
+            *out++ = '.';
+        } else if (*c == '[') {
+            const char *end = c + 1;
+            if (*end == '!' || *end == '^') end++;
+            if (*end == ']') end++;
+            while (*end && *end != ']') end++;
+            if (*end == '\0') {
+                *out++ = '\\';  // Unterminated: fnmatch() treats '[' literally.
+                *out++ = '[';
+                continue;
+            }
+            if (memchr(c, '\\', end - c) != NULL) return NULL;
+            *out++ = '[';
+            c++;
+            if (*c == '!' || *c == '^') {
+                *out++ = '^';
+                c++;
+            }
+            while (c < end) *out++ = *c++;
+            *out++ = ']';
+        } else {
+            if (*c == '\\' && c[1] != '\0') c++;  // Backslash quotes the next character.
+            if (strchr(".[]()|*+?{}^$\\", *c) != NULL) *out++ = '\\';
+            *out++ = *c;
+        }
+    }
+    return out;
+}
+
+// Compile whitelist_globs into whitelist_glob_regex. Caller must hold whitelist_mutex.
+static void whitelist_compile_globs(void) {
+    if (whitelist_glob_count == 0) return;
+    size_t size = 4;
+    for (int i = 0; i < whitelist_glob_count; i++) size += 4 * strlen(whitelist_globs[i]) + 3;
+    char *regex = malloc(size);
+    if (!regex) return;
+
+    char *out = regex;
+    *out++ = '^';
+    *out++ = '(';
+    for (int i = 0; i < whitelist_glob_count && out; i++) {
+        if (i > 0) *out++ = '|';
+        *out++ = '(';
+        out = glob_to_regex(whitelist_globs[i], out);
+        if (out) *out++ = ')';
+    }
+    if (out) {
+        *out++ = ')';
+        *out++ = '$';
+        *out = '\0';
+        whitelist_glob_regex_ready = regcomp(&whitelist_glob_regex, regex, REG_EXTENDED | REG_NOSUB) == 0;
+    }
+    free(regex);
+}
+
+// Caller must hold whitelist_mutex.
+static int whitelist_matches_locked(const char *domain) {
+    if (whitelist_trie_matches(domain)) return 1;
+    if (whitelist_glob_regex_ready) {
+        return regexec(&whitelist_glob_regex, domain, 0, NULL, 0) == 0;
+    }
+    for (int i = 0; i < whitelist_glob_count; i++) {
+        if (fnmatch(whitelist_globs[i], domain, 0) == 0) return 1;
     }
-    pthread_mutex_unlock(&whitelist_mutex);
     return 0;
 }
 
+int whitelist_domain_matches(const char *name) {
+    char domain[DOMAIN_MAX_SIZE];
+    lowercase_copy(domain, name, sizeof(domain));
+    pthread_mutex_lock(&whitelist_mutex);
+    int matches = whitelist_matches_locked(domain);
+    pthread_mutex_unlock(&whitelist_mutex);
+    return matches;
+}
+
 static int load_whitelist_patterns(void) {
     const char *whitelist_paths[] = {
         "spotify-whitelist.txt",
@@ -229,17 +658,31 @@ static int load_whitelist_patterns(void) {
         i++;
     }
     if (!fp) return -1;
+    char iobuf[LIST_IO_BUFFER_SIZE];
+    setvbuf(fp, iobuf, _IOFBF, sizeof(iobuf));
     
     char line[512];
     whitelist_patterns = malloc(sizeof(char*) * 1000);
     whitelist_pattern_count = 0;
+    whitelist_globs = malloc(sizeof(char*) * 1000);
+    whitelist_glob_count = 0;
     
     while (fgets(line, sizeof(line), fp) && whitelist_pattern_count < 1000) {
-        char *domain = strtok(line, " \t\n#");
-        if (!domain || domain[0] == '#') continue;
-        whitelist_patterns[whitelist_pattern_count++] = strdup(domain);
+        // Skip comment lines before tokenizing: strtok() would skip a leading '#' as a delimiter.
+        char *start = line + strspn(line, " \t\r\n");
+        if (*start == '#') continue;
+        char *domain = strtok(start, " \t\r\n#");
+        if (!domain) continue;
+        // Patterns are lower-cased once here; domains are lower-cased when stored or looked up.
+        char *pattern = strdup(domain);
+        for (char *c = pattern; *c; c++) *c = tolower((unsigned char)*c);
+        whitelist_patterns[whitelist_pattern_count++] = pattern;
+        if (whitelist_trie_insert(pattern) != 0) {
+            whitelist_globs[whitelist_glob_count++] = pattern;
+        }
     }
     fclose(fp);
+    whitelist_compile_globs();
     return 0;
 }
 
@@ -258,80 +701,32 @@ void whitelist_resolver_update(int whitelist_map_fd_v4, int whitelist_map_fd_v6)
     
     pthread_mutex_lock(&whitelist_mutex);
     
-    const char *blacklist_paths[] = {
-        "spotify-blacklist.txt",
-        "/usr/local/share/ebaf/spotify-blacklist.txt",
-        NULL
-    };
-    
-    FILE *fp = NULL;
-    int i = 0;
-    while (blacklist_paths[i] != NULL) {
-        fp = fopen(blacklist_paths[i], "r");
-        if (fp != NULL) break;
-        i++;
-    }
-    
-    if (fp) {
-        char line[512];
-        while (fgets(line, sizeof(line), fp)) {
-            char *domain = strtok(line, " \t\n#");
-            if (!domain || domain[0] == '#') continue;
-            
-            int matches = 0;
-            for (int j = 0; j < whitelist_pattern_count; j++) {
-                if (fnmatch(whitelist_patterns[j], domain, 0) == 0) {
-                    matches = 1;
-                    break;
-                }
-            }
-            
-            if (matches) {
-                struct addrinfo hints, *res, *p;
-                memset(&hints, 0, sizeof hints);
-                hints.ai_family = AF_UNSPEC;
-                hints.ai_socktype = SOCK_STREAM;
-                
-                if (getaddrinfo(domain, NULL, &hints, &res) == 0) {
-                    for(p = res; p != NULL; p = p->ai_next) {
-                        __u64 value = 1;
-                        if (p->ai_family == AF_INET) {
-                            __u32 ip = ((struct sockaddr_in *)p->ai_addr)->sin_addr.s_addr;
-                            bpf_map_update_elem(whitelist_map_fd_v4, &ip, &value, BPF_ANY);
-                        } else if (p->ai_family == AF_INET6) {
-                            struct in6_addr ip6 = ((struct sockaddr_in6 *)p->ai_addr)->sin6_addr;
-                            bpf_map_update_elem(whitelist_map_fd_v6, &ip6, &value, BPF_ANY);
-                        }
-                    }
-                    freeaddrinfo(res);
-                }
-            }
+    // Whitelisted blacklist domains. The blacklist was already parsed into the domain store,
+    // so walk that instead of reading and tokenizing the file a second time. Addresses are
+    // resolved into the entries, where the blacklist pass reuses them.
+    dns_cache_load();
+    time_t now = time(NULL);
+    pthread_mutex_lock(&domain_mutex);
+    for (int i = 0; i < domain_count; i++) {
+        if (whitelist_matches_locked(domains[i].domain) && ensure_domain_resolved(&domains[i], now) == 0) {
+            push_domain_ips(&domains[i], whitelist_map_fd_v4, whitelist_map_fd_v6, 1);
         }
-        fclose(fp);
     }
     
-    // Resolve explicit non-wildcard patterns
+    // Resolve explicit non-wildcard patterns (those on the blacklist were handled above)
     for (int i = 0; i < whitelist_pattern_count; i++) {
-        if (strchr(whitelist_patterns[i], '*') == NULL) {
-            struct addrinfo hints, *res, *p;
-            memset(&hints, 0, sizeof hints);
-            hints.ai_family = AF_UNSPEC;
-            hints.ai_socktype = SOCK_STREAM;
-            
-            if (getaddrinfo(whitelist_patterns[i], NULL, &hints, &res) == 0) {
-                for(p = res; p != NULL; p = p->ai_next) {
-                    __u64 value = 1;
-                    if (p->ai_family == AF_INET) {
-                        __u32 ip = ((struct sockaddr_in *)p->ai_addr)->sin_addr.s_addr;
-                        bpf_map_update_elem(whitelist_map_fd_v4, &ip, &value, BPF_ANY);
-                    } else if (p->ai_family == AF_INET6) {
-                        struct in6_addr ip6 = ((struct sockaddr_in6 *)p->ai_addr)->sin6_addr;
-                        bpf_map_update_elem(whitelist_map_fd_v6, &ip6, &value, BPF_ANY);
-                    }
-                }
-                freeaddrinfo(res);
+        if (strchr(whitelist_patterns[i], '*') == NULL &&
+            !(domain_index && find_domain_entry(whitelist_patterns[i]))) {
+            // Resolved through a temporary entry, on the same path as blacklist domains.
+            struct domain_entry entry;
+            init_domain_ips(&entry);
+            lowercase_copy(entry.domain, whitelist_patterns[i], sizeof(entry.domain));
+            if (ensure_domain_resolved(&entry, now) == 0) {
+                push_domain_ips(&entry, whitelist_map_fd_v4, whitelist_map_fd_v6, 1);
             }
+            free_domain_ips(&entry);
         }
     }
+    pthread_mutex_unlock(&domain_mutex);
     pthread_mutex_unlock(&whitelist_mutex);
 }
\ No newline at end of file
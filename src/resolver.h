@@ -1,12 +1,14 @@
 #ifndef RESOLVER_H
 #define RESOLVER_H
 
+#include <time.h>
 #include <linux/in6.h>
 #include "adblocker.h"
 
 struct domain_entry {
     char domain[DOMAIN_MAX_SIZE];
     __u64 total_drops;
+    time_t expires;  // When the resolved addresses go stale; 0 if not resolved yet.
     
     // IPv4 tracking
     __u32 *resolved_ipv4;
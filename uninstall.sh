@@ -78,6 +78,7 @@ sudo rm -rf $INSTALL_SHARE
 
 print_info "Removing Temporary Tracking Files..."
 sudo rm -f /tmp/ebaf-*
+sudo rm -rf /var/cache/ebaf
 
 printf "\n${GREEN}${BOLD}══════════════════════════════════════════════════════════════════════════════════${NC}\n"
 printf "${WHITE}${BOLD}                      UNINSTALLATION COMPLETED!                               ${NC}\n"